@@ -1,10 +1,18 @@
-import json
+import asyncio
+import csv
+import functools
 import os
-import subprocess
+import re
+import sys
 import threading
+import time
+import weakref
+from collections.abc import Callable, Coroutine
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Any
 
+import orjson
 import polars as pl
 
 from src.config import settings
@@ -15,6 +23,39 @@ from src.utils.logger import setup_logger
 
 logger = setup_logger()
 
+# サブプロセスの起動と終了待ちを行うイベントループ（初回利用時に専用スレッドで起動する）
+_monitor_loop: asyncio.AbstractEventLoop | None = None
+_monitor_loop_lock = threading.Lock()
+
+# 出力先ディレクトリはレポート起動のたびではなくインポート時に一度だけ作成する
+for _dir in (settings.CONFIG_DIR, settings.INPUT_DIR, settings.REPORT_DIR):
+    try:
+        _dir.mkdir(parents=True, exist_ok=True)
+    except OSError as e:
+        logger.warning(f"Failed to create directory {_dir}: {e}")
+
+# ステータスファイルから読み込むトークン使用量のキー
+_TOKEN_USAGE_KEYS = ("total_token_usage", "token_usage_input", "token_usage_output")
+_TOKEN_USAGE_RE = re.compile(rb'"(total_token_usage|token_usage_input|token_usage_output)"\s*:\s*(\d+)\s*[,}]')
+
+# レポートの後処理をスラッグごとに直列化するためのロック（使われなくなったロックは自動的に破棄される）
+_slug_locks: weakref.WeakValueDictionary[str, threading.Lock] = weakref.WeakValueDictionary()
+_slug_locks_guard = threading.Lock()
+
+# この件数未満の入力はpolarsを使わず標準のcsvで書き出す
+_SMALL_INPUT_THRESHOLD = 2000
+
+# analysis_core の起動コマンドの共通部分（APIと同じインタプリタで実行する）
+_BASE_CMD = (sys.executable, "-m", "analysis_core", "--skip-interaction", "--without-html")
+
+# 入力CSVの基本列とCommentのフィールドの対応
+_BASE_INPUT_COLUMNS = {
+    "comment-id": "id",
+    "comment-body": "comment",
+    "source": "source",
+    "url": "url",
+}
+
 
 def _build_config(report_input: ReportInput) -> dict[str, Any]:
     comment_num = len(report_input.comments)
@@ -57,15 +98,85 @@ def _build_config(report_input: ReportInput) -> dict[str, Any]:
     return config
 
 
+def _build_cmd(config_paths: list[Path], *extra_args: str) -> list[str]:
+    """analysis_core を起動するコマンドを組み立てる（複数の設定ファイルは1つのプロセスで順に実行される）"""
+    return [
+        *_BASE_CMD,
+        "--config",
+        *map(str, config_paths),
+        "--output-dir",
+        str(settings.REPORT_DIR),
+        "--input-dir",
+        str(settings.INPUT_DIR),
+        *extra_args,
+    ]
+
+
+def _build_env(user_api_key: str | None) -> dict[str, str] | None:
+    """
+    サブプロセスに渡す環境変数を組み立てる
+
+    追加する変数がない場合は None を返し、環境変数をコピーせずに親プロセスの環境をそのまま引き継がせる。
+    """
+    if not user_api_key:
+        return None
+    return {**os.environ, "USER_API_KEY": user_api_key}
+
+
+async def _spawn(cmd: list[str], env: dict[str, str] | None) -> asyncio.subprocess.Process:
+    """analysis_core のサブプロセスを起動する
+
+    close_fds は既定値（True）のままにする。uvicorn の --reload 実行時には待ち受けソケットが継承可能に
+    設定されるため、False にすると長時間動くパイプラインが API のソケットやリローダーのパイプを保持し続ける。
+    Linux の CPython は preexec_fn を指定しなければ vfork で起動するため、起動コストは親のメモリ量に比例しない。
+    """
+    return await asyncio.create_subprocess_exec(*cmd, env=env)
+
+
+def _get_monitor_loop() -> asyncio.AbstractEventLoop:
+    """サブプロセスの監視用イベントループを取得する"""
+    global _monitor_loop
+    with _monitor_loop_lock:
+        if _monitor_loop is None:
+            _monitor_loop = asyncio.new_event_loop()
+            threading.Thread(target=_monitor_loop.run_forever, name="report-monitor", daemon=True).start()
+        return _monitor_loop
+
+
+def _start_pipeline(
+    cmd: list[str],
+    env: dict[str, str] | None,
+    monitor: Callable[[asyncio.subprocess.Process], Coroutine[Any, Any, None]],
+) -> None:
+    """
+    analysis_core を起動し、終了の監視を監視用イベントループに登録する
+
+    起動に失敗した場合は呼び出し元に例外を送出する。監視はスレッドを占有せず、イベントループ上で行う。
+
+    Args:
+        cmd: 起動するコマンド
+        env: サブプロセスの環境変数（Noneの場合はAPIの環境変数を引き継ぐ）
+        monitor: 起動したプロセスを受け取り、終了を監視するコルーチンを返す関数
+    """
+    loop = _get_monitor_loop()
+    process = asyncio.run_coroutine_threadsafe(_spawn(cmd, env), loop).result()
+    asyncio.run_coroutine_threadsafe(monitor(process), loop)
+
+
 def save_config_file(report_input: ReportInput) -> Path:
     config = _build_config(report_input)
     config_path = settings.CONFIG_DIR / f"{report_input.input}.json"
-    config_path.parent.mkdir(parents=True, exist_ok=True)
-    with open(config_path, "w") as f:
-        json.dump(config, f, indent=4, ensure_ascii=False)
+    config_path.write_bytes(orjson.dumps(config, option=orjson.OPT_INDENT_2))
     return config_path
 
 
+def _to_csv_value(value: Any) -> str:
+    """属性値を、書き出し方法によらず同じCSV表現になる文字列に変換する（真偽値はpolarsと同じく小文字）"""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value)
+
+
 def save_input_file(report_input: ReportInput) -> Path:
     """
     入力データをCSVファイルとして保存する
@@ -76,32 +187,82 @@ def save_input_file(report_input: ReportInput) -> Path:
     Returns:
         Path: 保存されたCSVファイルのパス
     """
-    comments = []
+    # 行ごとのdictではなく列ごとのリストとして組み立てる
+    columns: dict[str, list[Any]] = {column: [] for column in _BASE_INPUT_COLUMNS}
+    attributes_per_comment: list[dict[str, Any]] = []
     for comment in report_input.comments:
-        # 基本フィールドの設定
-        comment_data = {
-            "comment-id": comment.id,
-            "comment-body": comment.comment,
-            "source": comment.source,
-            "url": comment.url,
-        }
+        for column, field in _BASE_INPUT_COLUMNS.items():
+            columns[column].append(getattr(comment, field))
 
-        # 追加の属性フィールドを含める
-        for key, value in comment.dict(exclude={"id", "comment", "source", "url"}).items():
-            if value is not None:
-                # すでに"attribute_"プレフィックスがついているかチェック
-                comment_data[key] = value
+        # Commentの宣言済みフィールドはすべて基本列なので、追加の属性はmodel_extraにのみ存在する
+        attributes = {
+            key: _to_csv_value(value) for key, value in (comment.model_extra or {}).items() if value is not None
+        }
+        attributes_per_comment.append(attributes)
 
-        comments.append(comment_data)
+    # 追加の属性フィールドは、いずれかのコメントに値があれば列として含める
+    for attributes in attributes_per_comment:
+        for key in attributes:
+            if key not in columns:
+                columns[key] = [attrs.get(key) for attrs in attributes_per_comment]
 
     input_path = settings.INPUT_DIR / f"{report_input.input}.csv"
-    input_path.parent.mkdir(parents=True, exist_ok=True)
-    df = pl.DataFrame(comments)
-    df.write_csv(input_path)
+    if len(report_input.comments) < _SMALL_INPUT_THRESHOLD:
+        # 件数が少ない場合はArrowの列を確保するより標準のcsvで書き出す方が速い
+        with open(input_path, "w", newline="", encoding="utf-8") as f:
+            # polarsと同様に空文字をNone（空欄）と区別し、\rを含む値も引用符で囲むため、None以外はすべて引用する
+            writer = csv.writer(f, lineterminator="\n", quoting=csv.QUOTE_NOTNULL)
+            writer.writerow(columns)
+            writer.writerows(zip(*columns.values(), strict=True))
+        return input_path
+
+    # 値はすべて文字列（またはNone）なので、型推論を行わず全列を文字列として宣言する
+    # このフレームはCSVの書き出しにのみ使い、analysis_core側の型は従来どおりread_csvの推論で決まる
+    pl.LazyFrame(columns, schema=dict.fromkeys(columns, pl.String)).sink_csv(input_path, engine="streaming")
     return input_path
 
 
-def _monitor_process(process: subprocess.Popen, slug: str) -> None:
+def _read_token_usage(status_file: Path) -> tuple[int, int, int]:
+    """
+    ステータスファイルからトークン使用量（合計・入力・出力）を読み込む
+
+    ステータスファイルには設定や実行履歴も含まれ大きくなりうるため、JSON全体をパースせずに対象のキーだけを抽出する。
+    キーが見つからない場合や複数回出現する場合（ネストしたオブジェクトに同名のキーがある場合）は全体をパースする。
+    """
+    data = status_file.read_bytes()
+    found: dict[str, list[int]] = {}
+    for match in _TOKEN_USAGE_RE.finditer(data):
+        found.setdefault(match.group(1).decode(), []).append(int(match.group(2)))
+    if all(len(found.get(key, [])) == 1 for key in _TOKEN_USAGE_KEYS):
+        total, input_, output = (found[key][0] for key in _TOKEN_USAGE_KEYS)
+    else:
+        status_data = orjson.loads(data)
+        total, input_, output = (status_data.get(key, 0) for key in _TOKEN_USAGE_KEYS)
+    return total, input_, output
+
+
+@functools.lru_cache(maxsize=256)
+def _read_config_meta(config_path: str, mtime_ns: int) -> tuple[str | None, str | None]:
+    """
+    設定ファイルから provider と model を読み込む
+
+    mtime_ns をキャッシュキーに含めるため、ファイルが更新されない限り再読み込みしない。
+    """
+    config_data = orjson.loads(Path(config_path).read_bytes())
+    return config_data.get("provider"), config_data.get("model")
+
+
+def _lock_for(slug: str) -> threading.Lock:
+    """スラッグに対応するロックを取得する"""
+    with _slug_locks_guard:
+        lock = _slug_locks.get(slug)
+        if lock is None:
+            lock = threading.Lock()
+            _slug_locks[slug] = lock
+        return lock
+
+
+async def _monitor_process(process: asyncio.subprocess.Process, slug: str) -> None:
     """
     サブプロセスの実行を監視し、完了時にステータスを更新する
 
@@ -109,26 +270,82 @@ def _monitor_process(process: subprocess.Popen, slug: str) -> None:
         process: 監視対象のサブプロセス
         slug: レポートのスラッグ
     """
-    retcode = process.wait()
+    # run_coroutine_threadsafeのFutureは参照されないため、例外はここでログに残す
+    try:
+        retcode = await process.wait()
+        # ステータス更新やストレージ同期はブロッキング処理のため、イベントループを止めないよう別スレッドで実行する
+        await asyncio.to_thread(_handle_process_exit, slug, retcode)
+    except Exception:
+        logger.exception(f"Error monitoring pipeline process for {slug}")
+
+
+async def _monitor_batch_process(process: asyncio.subprocess.Process, slugs: list[str], started_at: float) -> None:
+    """
+    複数レポートをまとめて処理するサブプロセスを監視し、完了時に各レポートのステータスを更新する
+
+    Args:
+        process: 監視対象のサブプロセス
+        slugs: 処理対象のレポートのスラッグ
+        started_at: サブプロセスの起動時刻（UNIX時間）
+    """
+    try:
+        retcode = await process.wait()
+        results = await asyncio.gather(
+            *(
+                asyncio.to_thread(_handle_process_exit, slug, _batch_item_retcode(slug, retcode, started_at))
+                for slug in slugs
+            ),
+            return_exceptions=True,
+        )
+    except Exception:
+        logger.exception(f"Error monitoring batch pipeline process for {', '.join(slugs)}")
+        return
+    for slug, result in zip(slugs, results, strict=True):
+        if isinstance(result, Exception):
+            logger.error(f"Error handling pipeline exit for {slug}", exc_info=result)
+
+
+def _batch_item_retcode(slug: str, retcode: int, started_at: float) -> int:
+    """
+    まとめて処理したレポートのうち、指定したレポートの終了コードを判定する
+
+    プロセスの終了コードは1件でも失敗すると0以外になるため、失敗時はレポートごとのステータスファイルを確認し、
+    今回の実行で完了しているレポートは成功として扱う。
+    """
     if retcode == 0:
-        # レポート生成成功時、ステータスを更新
-        try:
-            status_file = settings.REPORT_DIR / slug / "hierarchical_status.json"
-            if status_file.exists():
-                with open(status_file) as f:
-                    status_data = json.load(f)
-                    total_token_usage = status_data.get("total_token_usage", 0)
-                    token_usage_input = status_data.get("token_usage_input", 0)
-                    token_usage_output = status_data.get("token_usage_output", 0)
+        return 0
+    status_file = settings.REPORT_DIR / slug / "hierarchical_status.json"
+    try:
+        if status_file.stat().st_mtime >= started_at:
+            if orjson.loads(status_file.read_bytes()).get("status") == "completed":
+                return 0
+    except (OSError, orjson.JSONDecodeError):
+        pass
+    return retcode
+
+
+def _handle_process_exit(slug: str, retcode: int) -> None:
+    """
+    サブプロセスの終了コードに応じてステータスを更新し、成功時はファイルをストレージに同期する
+
+    Args:
+        slug: レポートのスラッグ
+        retcode: サブプロセスの終了コード
+    """
+    # 同じレポートの後処理が同時に走った場合に、トークン使用量・ステータスの更新と同期が混ざらないようにする
+    with _lock_for(slug):
+        if retcode == 0:
+            # レポート生成成功時、ステータスを更新
+            try:
+                status_file = settings.REPORT_DIR / slug / "hierarchical_status.json"
+                if status_file.exists():
+                    total_token_usage, token_usage_input, token_usage_output = _read_token_usage(status_file)
 
                     config_file = settings.CONFIG_DIR / f"{slug}.json"
                     provider = None
                     model = None
                     if config_file.exists():
-                        with open(config_file) as f:
-                            config_data = json.load(f)
-                            provider = config_data.get("provider")
-                            model = config_data.get("model")
+                        provider, model = _read_config_meta(str(config_file), config_file.stat().st_mtime_ns)
 
                     logger.info(
                         f"Found token usage in status file for {slug}: total={total_token_usage}, input={token_usage_input}, output={token_usage_output}, provider={provider}, model={model}"
@@ -136,32 +353,38 @@ def _monitor_process(process: subprocess.Popen, slug: str) -> None:
                     update_token_usage(
                         slug, total_token_usage, token_usage_input, token_usage_output, provider or None, model or None
                     )
-        except Exception as e:
-            logger.error(f"Error updating token usage for {slug}: {e}")
-
-        set_status(slug, "ready")
-
-        logger.info(f"Syncing files for {slug} to storage")
-        report_sync_service = ReportSyncService()
-        # レポートファイルをストレージに同期し、JSONファイル以外を削除
-        report_sync_service.sync_report_files_to_storage(slug)
-        # 入力ファイルをストレージに同期し、ローカルファイルを削除
-        report_sync_service.sync_input_file_to_storage(slug)
-        # 設定ファイルをストレージに同期
-        report_sync_service.sync_config_file_to_storage(slug)
-        # ステータスファイルをストレージに同期
-        report_sync_service.sync_status_file_to_storage()
-
-    else:
-        import signal
+            except Exception as e:
+                logger.error(f"Error updating token usage for {slug}: {e}")
+
+            set_status(slug, "ready")
+
+            logger.info(f"Syncing files for {slug} to storage")
+            report_sync_service = ReportSyncService()
+            # 各ファイルの同期は互いに独立しているため並列に実行する
+            with ThreadPoolExecutor(max_workers=4, thread_name_prefix="report-sync") as executor:
+                futures = [
+                    # レポートファイルをストレージに同期し、JSONファイル以外を削除
+                    executor.submit(report_sync_service.sync_report_files_to_storage, slug),
+                    # 入力ファイルをストレージに同期し、ローカルファイルを削除
+                    executor.submit(report_sync_service.sync_input_file_to_storage, slug),
+                    # 設定ファイルをストレージに同期
+                    executor.submit(report_sync_service.sync_config_file_to_storage, slug),
+                    # ステータスファイルをストレージに同期
+                    executor.submit(report_sync_service.sync_status_file_to_storage),
+                ]
+            for future in futures:
+                future.result()
 
-        if retcode < 0:
-            sig = -retcode
-            sig_name = signal.Signals(sig).name if sig in signal.Signals._value2member_map_ else f"signal {sig}"
-            logger.error(f"Pipeline process for {slug} was killed by {sig_name} (exit code {retcode})")
         else:
-            logger.error(f"Pipeline process for {slug} exited with code {retcode}")
-        set_status(slug, "error")
+            import signal
+
+            if retcode < 0:
+                sig = -retcode
+                sig_name = signal.Signals(sig).name if sig in signal.Signals._value2member_map_ else f"signal {sig}"
+                logger.error(f"Pipeline process for {slug} was killed by {sig_name} (exit code {retcode})")
+            else:
+                logger.error(f"Pipeline process for {slug} exited with code {retcode}")
+            set_status(slug, "error")
 
 
 def launch_report_generation(report_input: ReportInput, user_api_key: str | None = None) -> None:
@@ -172,26 +395,11 @@ def launch_report_generation(report_input: ReportInput, user_api_key: str | None
         add_new_report_to_status(report_input)
         config_path = save_config_file(report_input)
         save_input_file(report_input)
-        cmd = [
-            "python",
-            "-m",
-            "analysis_core",
-            "--config",
-            str(config_path),
-            "--output-dir",
-            str(settings.REPORT_DIR),
-            "--input-dir",
-            str(settings.INPUT_DIR),
-            "--skip-interaction",
-            "--without-html",
-        ]
-
-        env = os.environ.copy()
-        if user_api_key:
-            env["USER_API_KEY"] = user_api_key
-
-        process = subprocess.Popen(cmd, env=env)
-        threading.Thread(target=_monitor_process, args=(process, report_input.input), daemon=True).start()
+        cmd = _build_cmd([config_path])
+
+        env = _build_env(user_api_key)
+
+        _start_pipeline(cmd, env, functools.partial(_monitor_process, slug=report_input.input))
     except Exception as e:
         set_status(report_input.input, "error")
         logger.error(f"Error launching report generation: {e}")
@@ -203,26 +411,11 @@ def launch_report_generation_from_config(config_path: Path, slug: str, user_api_
     既存のconfigファイルからanalysis-coreを起動する関数。
     """
     try:
-        cmd = [
-            "python",
-            "-m",
-            "analysis_core",
-            "--config",
-            str(config_path),
-            "--output-dir",
-            str(settings.REPORT_DIR),
-            "--input-dir",
-            str(settings.INPUT_DIR),
-            "--skip-interaction",
-            "--without-html",
-        ]
-
-        env = os.environ.copy()
-        if user_api_key:
-            env["USER_API_KEY"] = user_api_key
-
-        process = subprocess.Popen(cmd, env=env)
-        threading.Thread(target=_monitor_process, args=(process, slug), daemon=True).start()
+        cmd = _build_cmd([config_path])
+
+        env = _build_env(user_api_key)
+
+        _start_pipeline(cmd, env, functools.partial(_monitor_process, slug=slug))
     except Exception as e:
         set_status(slug, "error")
         logger.error(f"Error launching report generation from config: {e}")
@@ -235,29 +428,51 @@ def execute_aggregation(slug: str, user_api_key: str | None = None) -> bool:
     """
     try:
         config_path = settings.CONFIG_DIR / f"{slug}.json"
-        cmd = [
-            "python",
-            "-m",
-            "analysis_core",
-            "--config",
-            str(config_path),
-            "--output-dir",
-            str(settings.REPORT_DIR),
-            "--input-dir",
-            str(settings.INPUT_DIR),
-            "--skip-interaction",
-            "--without-html",
-            "--only",
-            "hierarchical_aggregation",
-        ]
-
-        env = os.environ.copy()
-        if user_api_key:
-            env["USER_API_KEY"] = user_api_key
-
-        process = subprocess.Popen(cmd, env=env)
-        threading.Thread(target=_monitor_process, args=(process, slug), daemon=True).start()
+        cmd = _build_cmd([config_path], "--only", "hierarchical_aggregation")
+
+        env = _build_env(user_api_key)
+
+        _start_pipeline(cmd, env, functools.partial(_monitor_process, slug=slug))
         return True
     except Exception as e:
         logger.error(f"Error executing aggregation: {e}")
         return False
+
+
+def launch_report_generation_batch(report_inputs: list[ReportInput], user_api_key: str | None = None) -> None:
+    """
+    複数のレポートを1つの analysis-core プロセスで順に生成する関数。
+
+    インタプリタの起動や重いライブラリのインポートがレポートごとに繰り返されないため、
+    小さなレポートをまとめて作成する場合に launch_report_generation を個別に呼ぶより速い。
+    """
+    if not report_inputs:
+        return
+
+    slugs = [report_input.input for report_input in report_inputs]
+    # 同じスラッグが含まれると設定・入力ファイルやステータスが互いに上書きされるため、登録前に拒否する
+    duplicated_slugs = sorted({slug for slug in slugs if slugs.count(slug) > 1})
+    if duplicated_slugs:
+        raise ValueError(f"Duplicate report slugs in batch: {', '.join(duplicated_slugs)}")
+
+    try:
+        for report_input in report_inputs:
+            add_new_report_to_status(report_input)
+        with ThreadPoolExecutor(max_workers=min(len(report_inputs), 8)) as executor:
+            config_paths = list(executor.map(save_config_file, report_inputs))
+            list(executor.map(save_input_file, report_inputs))
+        cmd = _build_cmd(config_paths)
+
+        env = _build_env(user_api_key)
+
+        # 起動前の時刻を記録し、今回の実行で更新されたステータスファイルだけを完了扱いにする
+        started_at = time.time()
+        _start_pipeline(cmd, env, functools.partial(_monitor_batch_process, slugs=slugs, started_at=started_at))
+    except Exception as e:
+        for slug in slugs:
+            try:
+                set_status(slug, "error")
+            except ValueError:
+                pass  # ステータスに登録される前に失敗したレポート
+        logger.error(f"Error launching batch report generation: {e}")
+        raise e
@@ -1,5 +1,6 @@
 import os
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 from azure.core.exceptions import ResourceNotFoundError
@@ -127,6 +128,9 @@ class AzureBlobStorageService(StorageService):
     ファイルやディレクトリのアップロード・ダウンロードをAzure Blob Storageとの間で行います。
     """
 
+    # upload_directoryで同時にアップロードするファイル数
+    UPLOAD_CONCURRENCY = 8
+
     def __init__(self):
         """AzureBlobStorageServiceのコンストラクタ
 
@@ -225,9 +229,7 @@ class AzureBlobStorageService(StorageService):
             if prefix and not prefix.endswith("/"):
                 prefix += "/"
 
-            files_processed = 0
-
-            upload_results = []
+            upload_targets = []
             for root, _, files in os.walk(local_dir_path):
                 for filename in files:
                     file_path = os.path.join(root, filename)
@@ -238,9 +240,16 @@ class AzureBlobStorageService(StorageService):
                     if not self._has_target_suffix(remote_blob_path, target_suffixes):
                         continue
 
-                    files_processed += 1
-                    success = self.upload_file(file_path, remote_blob_path, skip_if_same=skip_if_same)
-                    upload_results.append(success)
+                    upload_targets.append((file_path, remote_blob_path))
+
+            files_processed = len(upload_targets)
+            # 小さいファイルが多いとリクエストごとの往復時間が支配的になるため、並列にアップロードする
+            with ThreadPoolExecutor(max_workers=self.UPLOAD_CONCURRENCY) as executor:
+                futures = [
+                    executor.submit(self.upload_file, file_path, remote_blob_path, skip_if_same=skip_if_same)
+                    for file_path, remote_blob_path in upload_targets
+                ]
+            upload_results = [future.result() for future in futures]
 
             if files_processed == 0:
                 logger.warning(f"アップロード対象のファイルが見つかりませんでした。パス: '{local_dir_path}'")
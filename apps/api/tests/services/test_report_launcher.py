@@ -1,29 +1,20 @@
 def test_user_api_key_propagation_to_env(monkeypatch):
     # user_api_keyが指定された場合、その値が環境変数USER_API_KEYにセットされてサブプロセスに渡ることを確認
-    import subprocess
-    import threading
+    import asyncio
 
     from src.schemas.admin_report import Prompt, ReportInput
     from src.services import report_launcher
 
     called = {}
 
-    class DummyPopen:
-        def __init__(self, *args, **kwargs):
-            called["env"] = kwargs.get("env", {})
+    async def dummy_create_subprocess_exec(*args, **kwargs):
+        called["env"] = kwargs.get("env", {})
 
-        def wait(self):
-            return 0
-
-    class DummyThread:
-        def __init__(self, *args, **kwargs):
-            pass
-
-        def start(self):
-            pass  # Don't actually start the thread
+    async def dummy_monitor_process(*args, **kwargs):
+        pass  # Don't actually wait for the process
 
-    monkeypatch.setattr(subprocess, "Popen", DummyPopen)
-    monkeypatch.setattr(threading, "Thread", DummyThread)
+    monkeypatch.setattr(asyncio, "create_subprocess_exec", dummy_create_subprocess_exec)
+    monkeypatch.setattr(report_launcher, "_monitor_process", dummy_monitor_process)
     report_input = ReportInput(
         input="dummy",
         question="q",
@@ -45,30 +36,21 @@ def test_user_api_key_propagation_to_env(monkeypatch):
 
 def test_env_user_api_key_not_set_when_user_api_key_not_provided(monkeypatch):
     # user_api_keyが指定されない場合、USER_API_KEYが環境変数にセットされずサブプロセスに渡らないことを確認
-    import subprocess
-    import threading
+    import asyncio
 
     from src.schemas.admin_report import Prompt, ReportInput
     from src.services import report_launcher
 
     called = {}
 
-    class DummyPopen:
-        def __init__(self, *args, **kwargs):
-            called["env"] = kwargs.get("env", {})
-
-        def wait(self):
-            return 0
-
-    class DummyThread:
-        def __init__(self, *args, **kwargs):
-            pass
+    async def dummy_create_subprocess_exec(*args, **kwargs):
+        called["env"] = kwargs.get("env", {})
 
-        def start(self):
-            pass  # Don't actually start the thread
+    async def dummy_monitor_process(*args, **kwargs):
+        pass  # Don't actually wait for the process
 
-    monkeypatch.setattr(subprocess, "Popen", DummyPopen)
-    monkeypatch.setattr(threading, "Thread", DummyThread)
+    monkeypatch.setattr(asyncio, "create_subprocess_exec", dummy_create_subprocess_exec)
+    monkeypatch.setattr(report_launcher, "_monitor_process", dummy_monitor_process)
     report_input = ReportInput(
         input="dummy",
         question="q",
@@ -85,35 +67,27 @@ def test_env_user_api_key_not_set_when_user_api_key_not_provided(monkeypatch):
         comments=[],
     )
     report_launcher.launch_report_generation(report_input)
-    assert "USER_API_KEY" not in called["env"]
+    # 環境変数を追加しない場合はコピーせず、親プロセスの環境をそのまま引き継ぐ
+    assert called["env"] is None
 
 
 def test_env_user_api_key_not_set_when_user_api_key_empty(monkeypatch):
     # user_api_keyが空文字列の場合、USER_API_KEYが環境変数にセットされずサブプロセスに渡らないことを確認
-    import subprocess
-    import threading
+    import asyncio
 
     from src.schemas.admin_report import Prompt, ReportInput
     from src.services import report_launcher
 
     called = {}
 
-    class DummyPopen:
-        def __init__(self, *args, **kwargs):
-            called["env"] = kwargs.get("env", {})
+    async def dummy_create_subprocess_exec(*args, **kwargs):
+        called["env"] = kwargs.get("env", {})
 
-        def wait(self):
-            return 0
-
-    class DummyThread:
-        def __init__(self, *args, **kwargs):
-            pass
-
-        def start(self):
-            pass  # Don't actually start the thread
+    async def dummy_monitor_process(*args, **kwargs):
+        pass  # Don't actually wait for the process
 
-    monkeypatch.setattr(subprocess, "Popen", DummyPopen)
-    monkeypatch.setattr(threading, "Thread", DummyThread)
+    monkeypatch.setattr(asyncio, "create_subprocess_exec", dummy_create_subprocess_exec)
+    monkeypatch.setattr(report_launcher, "_monitor_process", dummy_monitor_process)
     report_input = ReportInput(
         input="dummy",
         question="q",
@@ -130,34 +104,26 @@ def test_env_user_api_key_not_set_when_user_api_key_empty(monkeypatch):
         comments=[],
     )
     report_launcher.launch_report_generation(report_input, user_api_key="")
-    assert "USER_API_KEY" not in called["env"]
+    # 環境変数を追加しない場合はコピーせず、親プロセスの環境をそのまま引き継ぐ
+    assert called["env"] is None
 
 
 def test_user_api_key_propagation_to_env_in_aggregation(monkeypatch):
     # user_api_keyが指定された場合、その値が環境変数USER_API_KEYにセットされてサブプロセスに渡ることを確認（集約処理）
-    import subprocess
-    import threading
+    import asyncio
 
     from src.services import report_launcher
 
     called = {}
 
-    class DummyPopen:
-        def __init__(self, *args, **kwargs):
-            called["env"] = kwargs.get("env", {})
-
-        def wait(self):
-            return 0
-
-    class DummyThread:
-        def __init__(self, *args, **kwargs):
-            pass
+    async def dummy_create_subprocess_exec(*args, **kwargs):
+        called["env"] = kwargs.get("env", {})
 
-        def start(self):
-            pass  # Don't actually start the thread
+    async def dummy_monitor_process(*args, **kwargs):
+        pass  # Don't actually wait for the process
 
-    monkeypatch.setattr(subprocess, "Popen", DummyPopen)
-    monkeypatch.setattr(threading, "Thread", DummyThread)
+    monkeypatch.setattr(asyncio, "create_subprocess_exec", dummy_create_subprocess_exec)
+    monkeypatch.setattr(report_launcher, "_monitor_process", dummy_monitor_process)
     result = report_launcher.execute_aggregation("slug", user_api_key="test-key")
     assert called["env"]["USER_API_KEY"] == "test-key"
     assert result is True
@@ -165,29 +131,281 @@ def test_user_api_key_propagation_to_env_in_aggregation(monkeypatch):
 
 def test_env_user_api_key_not_set_in_aggregation_when_user_api_key_not_provided(monkeypatch):
     # user_api_keyが指定されない場合、USER_API_KEYが環境変数にセットされずサブプロセスに渡らないことを確認（集約処理）
-    import subprocess
-    import threading
+    import asyncio
 
     from src.services import report_launcher
 
     called = {}
 
-    class DummyPopen:
-        def __init__(self, *args, **kwargs):
-            called["env"] = kwargs.get("env", {})
+    async def dummy_create_subprocess_exec(*args, **kwargs):
+        called["env"] = kwargs.get("env", {})
+
+    async def dummy_monitor_process(*args, **kwargs):
+        pass  # Don't actually wait for the process
+
+    monkeypatch.setattr(asyncio, "create_subprocess_exec", dummy_create_subprocess_exec)
+    monkeypatch.setattr(report_launcher, "_monitor_process", dummy_monitor_process)
+    result = report_launcher.execute_aggregation("slug")
+    # 環境変数を追加しない場合はコピーせず、親プロセスの環境をそのまま引き継ぐ
+    assert called["env"] is None
+    assert result is True
+
+
+def test_read_token_usage_from_status_file(tmp_path):
+    # ステータスファイルからトークン使用量を抽出できることを確認
+    import json
+
+    from src.services import report_launcher
+
+    status_file = tmp_path / "hierarchical_status.json"
+    status_file.write_text(
+        json.dumps(
+            {
+                "status": "completed",
+                "total_token_usage": 300,
+                "token_usage_input": 200,
+                "token_usage_output": 100,
+                "completed_jobs": [{"step": "extraction", "token_usage": 300}],
+            },
+            indent=2,
+        )
+    )
+
+    assert report_launcher._read_token_usage(status_file) == (300, 200, 100)
+
+
+def test_read_token_usage_falls_back_to_full_parse_for_nested_keys(tmp_path):
+    # ネストしたオブジェクトに同名のキーがある場合、トップレベルの値が使われることを確認
+    import json
+
+    from src.services import report_launcher
+
+    status_file = tmp_path / "hierarchical_status.json"
+    status_file.write_text(
+        json.dumps(
+            {
+                "previous": {"total_token_usage": 1, "token_usage_input": 1, "token_usage_output": 0},
+                "total_token_usage": 300,
+                "token_usage_input": 200,
+            }
+        )
+    )
+
+    assert report_launcher._read_token_usage(status_file) == (300, 200, 0)
+
+
+def test_save_input_file_writes_attribute_columns(monkeypatch, tmp_path):
+    # 属性フィールドが列として出力され、値のないコメントは空欄になることを確認
+    import csv
+
+    from src.schemas.admin_report import Comment, Prompt, ReportInput
+    from src.services import report_launcher
+
+    monkeypatch.setattr(report_launcher.settings, "INPUT_DIR", tmp_path)
+    report_input = ReportInput(
+        input="dummy",
+        question="q",
+        intro="i",
+        model="m",
+        provider="p",
+        prompt=Prompt(extraction="", initial_labelling="", merge_labelling="", overview=""),
+        workers=1,
+        cluster=[1],
+        comments=[
+            Comment(id="1", comment="hello, world"),
+            Comment(id="2", comment="bye", source="web", attribute_age="20代"),
+        ],
+    )
+
+    input_path = report_launcher.save_input_file(report_input)
+
+    with open(input_path, encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    assert rows == [
+        {"comment-id": "1", "comment-body": "hello, world", "source": "", "url": "", "attribute_age": ""},
+        {"comment-id": "2", "comment-body": "bye", "source": "web", "url": "", "attribute_age": "20代"},
+    ]
 
-        def wait(self):
+
+def test_save_input_file_writes_same_values_for_small_and_large_inputs(monkeypatch, tmp_path):
+    # 件数によって書き出し方法が変わっても、analysis_coreがread_csvで読んだ結果が同じになることを確認
+    # （空文字と未指定の区別、改行文字、真偽値や数値の属性）
+    import polars as pl
+
+    from src.schemas.admin_report import Comment, Prompt, ReportInput
+    from src.services import report_launcher
+
+    monkeypatch.setattr(report_launcher.settings, "INPUT_DIR", tmp_path)
+    for num_comments in (2, report_launcher._SMALL_INPUT_THRESHOLD):
+        comments = [
+            Comment(id="1", comment="hello\rworld", source="", url="", attribute_flag=True, attribute_score=3.5)
+        ]
+        comments += [
+            Comment(id=str(i), comment="bye", url="https://example.com", attribute_flag=False)
+            for i in range(2, num_comments + 1)
+        ]
+        report_input = ReportInput(
+            input=f"dummy-{num_comments}",
+            question="q",
+            intro="i",
+            model="m",
+            provider="p",
+            prompt=Prompt(extraction="", initial_labelling="", merge_labelling="", overview=""),
+            workers=1,
+            cluster=[1],
+            comments=comments,
+        )
+
+        input_path = report_launcher.save_input_file(report_input)
+
+        rows = pl.read_csv(input_path).to_dicts()
+        assert len(rows) == num_comments
+        assert rows[:2] == [
+            {
+                "comment-id": 1,
+                "comment-body": "hello\rworld",
+                "source": "",
+                "url": "",
+                "attribute_flag": True,
+                "attribute_score": 3.5,
+            },
+            {
+                "comment-id": 2,
+                "comment-body": "bye",
+                "source": None,
+                "url": "https://example.com",
+                "attribute_flag": False,
+                "attribute_score": None,
+            },
+        ]
+
+
+def test_batch_item_retcode_uses_status_file_when_batch_failed(monkeypatch, tmp_path):
+    # まとめて実行したプロセスが失敗した場合、今回の実行で完了したレポートのみ成功扱いになることを確認
+    import json
+
+    from src.services import report_launcher
+
+    monkeypatch.setattr(report_launcher.settings, "REPORT_DIR", tmp_path)
+    for slug, status in (("done", "completed"), ("failed", "error")):
+        (tmp_path / slug).mkdir()
+        (tmp_path / slug / "hierarchical_status.json").write_text(json.dumps({"status": status}))
+
+    assert report_launcher._batch_item_retcode("done", 1, started_at=0) == 0
+    assert report_launcher._batch_item_retcode("failed", 1, started_at=0) == 1
+    assert report_launcher._batch_item_retcode("missing", 1, started_at=0) == 1
+    # 起動前に書かれたステータスファイルは前回の実行結果なので使わない
+    assert report_launcher._batch_item_retcode("done", 1, started_at=float("inf")) == 1
+
+
+def test_monitor_process_logs_exception_from_exit_handler(monkeypatch):
+    # 終了処理で例外が発生しても、監視コルーチンの外に伝播せずログに記録されることを確認
+    import asyncio
+
+    from src.services import report_launcher
+
+    logged = []
+
+    class DummyProcess:
+        async def wait(self):
             return 0
 
-    class DummyThread:
-        def __init__(self, *args, **kwargs):
-            pass
+    def failing_handle_process_exit(slug, retcode):
+        raise RuntimeError("sync failed")
 
-        def start(self):
-            pass  # Don't actually start the thread
+    monkeypatch.setattr(report_launcher, "_handle_process_exit", failing_handle_process_exit)
+    monkeypatch.setattr(report_launcher.logger, "exception", lambda message, *args, **kwargs: logged.append(message))
 
-    monkeypatch.setattr(subprocess, "Popen", DummyPopen)
-    monkeypatch.setattr(threading, "Thread", DummyThread)
-    result = report_launcher.execute_aggregation("slug")
-    assert "USER_API_KEY" not in called["env"]
-    assert result is True
+    asyncio.run(report_launcher._monitor_process(DummyProcess(), "slug"))
+
+    assert logged == ["Error monitoring pipeline process for slug"]
+
+
+def _batch_report_inputs(slugs):
+    from src.schemas.admin_report import Prompt, ReportInput
+
+    return [
+        ReportInput(
+            input=slug,
+            question="q",
+            intro="i",
+            model="m",
+            provider="p",
+            prompt=Prompt(extraction="", initial_labelling="", merge_labelling="", overview=""),
+            workers=1,
+            cluster=[1],
+            comments=[],
+        )
+        for slug in slugs
+    ]
+
+
+def test_launch_report_generation_batch_spawns_one_process_with_all_configs(monkeypatch, tmp_path):
+    # まとめて起動した場合、全レポートの設定ファイルを渡したプロセスが1つだけ起動されることを確認
+    import asyncio
+
+    from src.services import report_launcher
+
+    spawned = []
+
+    async def dummy_create_subprocess_exec(*args, **kwargs):
+        spawned.append(args)
+
+    async def dummy_monitor_batch_process(*args, **kwargs):
+        pass  # Don't actually wait for the process
+
+    monkeypatch.setattr(asyncio, "create_subprocess_exec", dummy_create_subprocess_exec)
+    monkeypatch.setattr(report_launcher, "_monitor_batch_process", dummy_monitor_batch_process)
+    monkeypatch.setattr(report_launcher, "add_new_report_to_status", lambda report_input: None)
+    monkeypatch.setattr(report_launcher.settings, "CONFIG_DIR", tmp_path)
+    monkeypatch.setattr(report_launcher.settings, "INPUT_DIR", tmp_path)
+
+    report_launcher.launch_report_generation_batch(_batch_report_inputs(["a", "b", "c"]))
+
+    assert len(spawned) == 1
+    cmd = list(spawned[0])
+    config_index = cmd.index("--config")
+    assert cmd[config_index + 1 : config_index + 4] == [str(tmp_path / f"{slug}.json") for slug in ("a", "b", "c")]
+
+
+def test_launch_report_generation_batch_marks_all_reports_error_when_spawn_fails(monkeypatch, tmp_path):
+    # プロセスの起動に失敗した場合、まとめて登録した全レポートがエラーになることを確認
+    import asyncio
+
+    import pytest
+
+    from src.services import report_launcher
+
+    statuses = {}
+
+    async def failing_create_subprocess_exec(*args, **kwargs):
+        raise OSError("spawn failed")
+
+    def dummy_set_status(slug, status):
+        statuses[slug] = status
+
+    monkeypatch.setattr(asyncio, "create_subprocess_exec", failing_create_subprocess_exec)
+    monkeypatch.setattr(report_launcher, "add_new_report_to_status", lambda report_input: None)
+    monkeypatch.setattr(report_launcher, "set_status", dummy_set_status)
+    monkeypatch.setattr(report_launcher.settings, "CONFIG_DIR", tmp_path)
+    monkeypatch.setattr(report_launcher.settings, "INPUT_DIR", tmp_path)
+
+    with pytest.raises(OSError):
+        report_launcher.launch_report_generation_batch(_batch_report_inputs(["a", "b"]))
+
+    assert statuses == {"a": "error", "b": "error"}
+
+
+def test_launch_report_generation_batch_rejects_duplicate_slugs(monkeypatch):
+    # 同じスラッグが含まれる場合、ステータスに登録する前にエラーになることを確認
+    import pytest
+
+    from src.services import report_launcher
+
+    added = []
+    monkeypatch.setattr(report_launcher, "add_new_report_to_status", added.append)
+
+    with pytest.raises(ValueError, match="Duplicate report slugs in batch: a$"):
+        report_launcher.launch_report_generation_batch(_batch_report_inputs(["a", "b", "a"]))
+
+    assert added == []
@@ -4,6 +4,7 @@ CLI entry point for analysis-core.
 Usage:
     python -m analysis_core --config config.json
     kouchou-analyze --config config.json
+    kouchou-analyze --config a.json b.json  # run several configs in one process
 """
 
 import argparse
@@ -24,8 +25,9 @@ def main() -> int:
         "--config",
         "-c",
         type=Path,
+        nargs="+",
         required=True,
-        help="Path to the configuration JSON file",
+        help="Path to the configuration JSON file (pass several to run them sequentially in one process)",
     )
     parser.add_argument(
         "--force",
@@ -75,15 +77,24 @@ def main() -> int:
 
     args = parser.parse_args()
 
-    # Validate config file exists
-    if not args.config.exists():
-        print(f"Error: Config file not found: {args.config}", file=sys.stderr)
+    # Validate config files exist
+    missing = [config_path for config_path in args.config if not config_path.exists()]
+    if missing:
+        for config_path in missing:
+            print(f"Error: Config file not found: {config_path}", file=sys.stderr)
         return 1
 
+    # Run every config even if an earlier one fails, so one bad report does not block the rest
+    exit_codes = [_run_config(config_path, args) for config_path in args.config]
+    return 0 if all(code == 0 for code in exit_codes) else 1
+
+
+def _run_config(config_path: Path, args: argparse.Namespace) -> int:
+    """Run (or dry-run) the pipeline for a single config file."""
     try:
         # Initialize the orchestrator
         orchestrator = PipelineOrchestrator.from_config(
-            config_path=args.config,
+            config_path=config_path,
             force=args.force,
             only=args.only,
             skip_interaction=args.skip_interaction,
@@ -104,7 +115,7 @@ def main() -> int:
 
         # Execute the pipeline
         print("Starting pipeline execution...")
-        print(f"  Config: {args.config}")
+        print(f"  Config: {config_path}")
         print(f"  Output: {orchestrator.output_base_dir}")
         print()
 
@@ -90,3 +90,18 @@ class TestCLI:
         assert "Execution Plan" in result.stdout
         assert "extraction" in result.stdout
         assert "embedding" in result.stdout
+
+    def test_cli_missing_one_of_multiple_configs(self, tmp_path):
+        """Test CLI fails before running anything when one of several configs is missing."""
+        config_path = tmp_path / "a.json"
+        config_path.write_text(json.dumps({"input": "a", "question": "Q?", "provider": "openai"}))
+
+        result = subprocess.run(
+            [sys.executable, "-m", "analysis_core", "--config", str(config_path), str(tmp_path / "missing.json")],
+            capture_output=True,
+            text=True,
+        )
+        assert result.returncode == 1
+        assert "Config file not found" in result.stderr
+        assert "missing.json" in result.stderr
+        assert "Starting pipeline execution" not in result.stdout
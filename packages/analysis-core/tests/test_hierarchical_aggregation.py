@@ -0,0 +1,44 @@
+"""Tests for hierarchical_aggregation joining arguments back to input comments."""
+
+import polars as pl
+
+from analysis_core.steps.hierarchical_aggregation import _build_arguments
+
+
+class TestBuildArguments:
+    """Verify arguments are linked to their original comments."""
+
+    def test_zero_padded_comment_ids_match_relations(self, tmp_path):
+        """Attributes and URLs survive when comment IDs are zero-padded in the input CSV."""
+        # Input CSV as written by the API (comment-id kept as text)
+        input_path = tmp_path / "input.csv"
+        input_path.write_text(
+            "comment-id,comment-body,source,url,attribute_age\n"
+            "0001,a,,https://example.com/1,20\n"
+            "0002,b,,https://example.com/2,30\n",
+            encoding="utf-8",
+        )
+        # extraction reads the input with read_csv, so relations.csv gets the inferred numeric IDs
+        extracted_ids = pl.read_csv(input_path)["comment-id"].to_list()
+        relations_path = tmp_path / "relations.csv"
+        pl.DataFrame({"arg-id": ["A1_0", "A2_0"], "comment-id": extracted_ids}).write_csv(relations_path)
+
+        clusters = pl.DataFrame(
+            {
+                "arg-id": ["A1_0", "A2_0"],
+                "argument": ["arg a", "arg b"],
+                "x": [0.0, 1.0],
+                "y": [0.0, 1.0],
+                "cluster-level-1-id": ["1_0", "1_1"],
+            }
+        )
+
+        arguments = _build_arguments(
+            clusters,
+            pl.read_csv(input_path),
+            pl.read_csv(relations_path),
+            {"enable_source_link": True},
+        )
+
+        assert [argument["url"] for argument in arguments] == ["https://example.com/1", "https://example.com/2"]
+        assert [argument["attributes"] for argument in arguments] == [{"age": 20}, {"age": 30}]